@@ -1,12 +1,96 @@
-import re
-from typing import Dict, List, Tuple
+import os
+from functools import lru_cache
+from importlib.util import find_spec
+from itertools import chain
+from typing import Dict, FrozenSet, List, Tuple
+from xml.etree import ElementTree
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from textblob import TextBlob
 
 from .models import DreamAnalysis
 
+# Category flags used in the combined word lexicon
+_UPPER = 1
+_DOWNER = 2
+_DYNAMIC = 4
+_STATIC = 8
+
+
+class _PunctTable(dict):
+    """``str.translate`` table mapping punctuation and symbols to spaces.
+
+    Any character that is not alphanumeric, an underscore or whitespace becomes
+    a space, so emoji, arrows and CJK punctuation split words apart just like
+    ASCII punctuation. Code points are classified on first use and cached.
+    """
+
+    def __missing__(self, code_point: int):
+        char = chr(code_point)
+        if char.isalnum() or char.isspace() or char == "_":
+            value = code_point
+        else:
+            value = " "
+        self[code_point] = value
+        return value
+
+
+_PUNCT_TABLE = _PunctTable()
+
+# Bit positions of the category flags, for unpacking mask arrays
+_CATEGORY_SHIFTS = np.arange(4)
+
+# Words that flip the polarity of the sentiment word that follows them
+_NEGATIONS = frozenset(("no", "not", "never"))
+
+
+def _load_sentiment_lexicon() -> Tuple[Dict[str, Tuple[float, float]], FrozenSet[str]]:
+    """Load TextBlob's English sentiment lexicon.
+
+    Returns word -> (polarity, intensity), averaged over senses and then over
+    part-of-speech tags the way TextBlob's pattern analyser does, together with
+    the adverbs that modify the word after them ("very good"). The XML file is
+    located without importing textblob, which would pull in nltk.
+    """
+    package_dir = find_spec("textblob").submodule_search_locations[0]
+    path = os.path.join(package_dir, "en", "en-sentiment.xml")
+
+    senses: Dict[str, Dict[str, List[Tuple[float, float]]]] = {}
+    for node in ElementTree.parse(path).getroot().iter("word"):
+        senses.setdefault(node.get("form"), {}).setdefault(node.get("pos"), []).append(
+            (float(node.get("polarity", 0.0)), float(node.get("intensity", 1.0)))
+        )
+
+    def mean(values: List[Tuple[float, float]]) -> Tuple[float, float]:
+        return (
+            sum(v[0] for v in values) / len(values),
+            sum(v[1] for v in values) / len(values),
+        )
+
+    lexicon: Dict[str, Tuple[float, float]] = {}
+    modifiers = set()
+    adjectives: Dict[str, Tuple[float, float]] = {}
+    for word, tags in senses.items():
+        by_tag = {tag: mean(values) for tag, values in tags.items()}
+        lexicon[word] = mean(list(by_tag.values()))
+        if "RB" in by_tag:
+            modifiers.add(word)
+        if "JJ" in by_tag:
+            adjectives[word] = by_tag["JJ"]
+
+    # Map adjectives to their adverbs ("terrible" -> "terribly"), as TextBlob does
+    for word, scores in adjectives.items():
+        if word.endswith("y"):
+            word = word[:-1] + "i"
+        if word.endswith("le"):
+            word = word[:-2]
+        lexicon[word + "ly"] = scores
+        modifiers.add(word + "ly")
+
+    return lexicon, frozenset(modifiers)
+
+
+_SENTIMENT, _MODIFIERS = _load_sentiment_lexicon()
+
 
 class Dreamanalyser:
     """Analyses dreams for emotional and dynamic content."""
@@ -106,46 +190,187 @@ class Dreamanalyser:
             "observing",
         }
 
-    def analyze_dream(self, dream_text: str) -> DreamAnalysis:
-        """Analyze a dream text and return emotional/dynamic scores."""
-        # Clean and process text
-        cleaned_text = self._clean_text(dream_text)
-
-        # Get sentiment analysis
-        blob = TextBlob(cleaned_text)
-        sentiment_polarity = blob.sentiment.polarity
-
-        # Calculate scores
-        upper_downer = self._calculate_emotional_score(cleaned_text, sentiment_polarity)
-        static_dynamic = self._calculate_dynamic_score(cleaned_text)
+        self._all_keywords = frozenset().union(
+            self.upper_words, self.downer_words, self.dynamic_words, self.static_words
+        )
 
-        # Extract keywords
-        keywords = self._extract_keywords(cleaned_text)
+        # Combined lexicon: word -> bitmask of the categories it belongs to
+        self._lex: Dict[str, int] = {
+            word: (
+                _UPPER * (word in self.upper_words)
+                | _DOWNER * (word in self.downer_words)
+                | _DYNAMIC * (word in self.dynamic_words)
+                | _STATIC * (word in self.static_words)
+            )
+            for word in self._all_keywords
+        }
 
-        # Calculate confidence based on text length and keyword matches
-        confidence = self._calculate_confidence(cleaned_text, keywords)
+        # Results for recently analysed texts, keyed on the raw dream text
+        self._analyze_cached = lru_cache(maxsize=4096)(self._analyze_text)
 
+    def analyze_dream(self, dream_text: str) -> DreamAnalysis:
+        """Analyze a dream text and return emotional/dynamic scores."""
+        upper_downer, static_dynamic, confidence, keywords = self._analyze_cached(
+            dream_text
+        )
         return DreamAnalysis(
             upper_downer_score=upper_downer,
             static_dynamic_score=static_dynamic,
             confidence=confidence,
-            keywords=keywords,
+            keywords=list(keywords),
         )
 
-    def _clean_text(self, text: str) -> str:
-        """Clean and normalize text."""
-        text = text.lower()
-        text = re.sub(r"[^\w\s]", " ", text)
-        text = " ".join(text.split())
-        return text
+    def analyze_dreams(self, dream_texts: List[str]) -> List[DreamAnalysis]:
+        """Analyze a batch of dream texts.
+
+        Category counts for the whole batch come from one flat array of word
+        bitmasks, summed per dream with a single segmented reduction.
+        """
+        word_lists = [self._tokenize(text) for text in dream_texts]
+        match_lists = [self._match_words(words) for words in word_lists]
+
+        # Flat bitmask array with each dream's matches as a contiguous segment
+        lengths = np.fromiter(map(len, match_lists), dtype=np.intp)
+        masks = np.fromiter(
+            chain.from_iterable(matches.values() for matches in match_lists),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        flags = (masks[:, None] >> _CATEGORY_SHIFTS) & 1
+
+        # reduceat misreads empty segments, so only reduce dreams with matches
+        counts = np.zeros((len(dream_texts), 4), dtype=np.int64)
+        has_matches = lengths > 0
+        if has_matches.any():
+            starts = np.cumsum(lengths) - lengths
+            counts[has_matches] = np.add.reduceat(flags, starts[has_matches], axis=0)
+
+        results = []
+        for words, matches, dream_counts in zip(
+            word_lists, match_lists, counts.tolist()
+        ):
+            upper_downer, static_dynamic, confidence, keywords = self._score_words(
+                words, matches, dream_counts
+            )
+            results.append(
+                DreamAnalysis(
+                    upper_downer_score=upper_downer,
+                    static_dynamic_score=static_dynamic,
+                    confidence=confidence,
+                    keywords=list(keywords),
+                )
+            )
+        return results
+
+    def _analyze_text(
+        self, dream_text: str
+    ) -> Tuple[float, float, float, Tuple[str, ...]]:
+        """Run the analysis pipeline, returning hashable results for caching."""
+        # Normalize and split the text in a single pass
+        words = self._tokenize(dream_text)
+
+        # Look up every word once, keeping lexicon hits in first-seen order
+        matches = self._match_words(words)
+        counts = self._count_categories(matches)
+
+        return self._score_words(words, matches, counts)
+
+    def _score_words(
+        self, words: List[str], matches: Dict[str, int], counts: List[int]
+    ) -> Tuple[float, float, float, Tuple[str, ...]]:
+        """Score a tokenized dream from its lexicon matches and category counts."""
+        upper_count, downer_count, dynamic_count, static_count = counts
 
-    def _calculate_emotional_score(self, text: str, sentiment: float) -> float:
-        """Calculate upper/downer score (-1 to 1)."""
-        words = set(text.split())
+        # Get sentiment analysis
+        sentiment_polarity = self._calculate_sentiment(words)
 
-        upper_count = len(words & self.upper_words)
-        downer_count = len(words & self.downer_words)
+        # Calculate scores
+        upper_downer = self._calculate_emotional_score(
+            upper_count, downer_count, sentiment_polarity
+        )
+        static_dynamic = self._calculate_dynamic_score(dynamic_count, static_count)
+
+        # Extract keywords
+        keywords = self._extract_keywords(matches)
 
+        # Calculate confidence based on text length and keyword matches
+        confidence = self._calculate_confidence(len(words), keywords)
+
+        return upper_downer, static_dynamic, confidence, tuple(keywords)
+
+    def _tokenize(self, text: str) -> List[str]:
+        """Lowercase the text, strip punctuation and split it into words."""
+        return text.lower().translate(_PUNCT_TABLE).split()
+
+    def _match_words(self, words: List[str]) -> Dict[str, int]:
+        """Map each distinct lexicon word in the text to its category bitmask."""
+        # Whole-word dict lookups rather than a substring automaton, which
+        # would also fire on "light" inside "delight". Repeated words keep the
+        # position of their first occurrence.
+        lex = self._lex
+        return {word: lex[word] for word in words if word in lex}
+
+    def _count_categories(self, matches: Dict[str, int]) -> List[int]:
+        """Count matched words per category in a single pass over their bitmasks."""
+        upper = downer = dynamic = static = 0
+        for mask in matches.values():
+            upper += mask & _UPPER
+            downer += (mask & _DOWNER) >> 1
+            dynamic += (mask & _DYNAMIC) >> 2
+            static += (mask & _STATIC) >> 3
+        return [upper, downer, dynamic, static]
+
+    def _calculate_sentiment(self, words: List[str]) -> float:
+        """Calculate lexicon sentiment polarity (-1 to 1).
+
+        Averages the polarity of the words found in the sentiment lexicon. As in
+        TextBlob, an adverb scales the word that follows it ("very happy") and a
+        preceding negation ("not happy") reverses and halves its polarity.
+        """
+        assessments: List[List] = []  # [polarity, negated] per assessed word
+        modifier = None  # Intensity of the preceding adverb
+        modifier_word = ""
+        negated = False
+        for word in words:
+            entry = _SENTIMENT.get(word)
+            if entry is None:
+                # Negations carry across short words ("not a happy dream")
+                if word in _NEGATIONS:
+                    negated = True
+                elif len(word) > 1:
+                    negated = False
+                if negated and modifier is not None and modifier_word.endswith("ly"):
+                    # "really not happy" negates the modified assessment
+                    assessments[-1][1] = True
+                    negated = False
+                elif len(word) > 2:
+                    modifier = None
+                continue
+
+            polarity, intensity = entry
+            if modifier is None:
+                assessments.append([polarity, False])
+            else:
+                assessments[-1][0] = max(-1.0, min(1.0, polarity * modifier))
+            if negated:
+                assessments[-1][1] = True
+                intensity = 1.0 / intensity
+
+            modifier = intensity if word in _MODIFIERS else None
+            modifier_word = word
+            negated = word in _NEGATIONS
+
+        if not assessments:
+            return 0.0
+        return sum(
+            -0.5 * polarity if negated else polarity
+            for polarity, negated in assessments
+        ) / len(assessments)
+
+    def _calculate_emotional_score(
+        self, upper_count: int, downer_count: int, sentiment: float
+    ) -> float:
+        """Calculate upper/downer score (-1 to 1)."""
         # Combine keyword-based scoring with sentiment analysis
         keyword_score = 0
         if upper_count > 0 or downer_count > 0:
@@ -157,13 +382,8 @@ class Dreamanalyser:
         # Ensure score is within bounds
         return max(-1.0, min(1.0, final_score))
 
-    def _calculate_dynamic_score(self, text: str) -> float:
+    def _calculate_dynamic_score(self, dynamic_count: int, static_count: int) -> float:
         """Calculate static/dynamic score (-1 to 1)."""
-        words = set(text.split())
-
-        dynamic_count = len(words & self.dynamic_words)
-        static_count = len(words & self.static_words)
-
         if dynamic_count == 0 and static_count == 0:
             # Default to slightly dynamic for most dreams
             return 0.1
@@ -175,36 +395,17 @@ class Dreamanalyser:
         score = (dynamic_count - static_count) / total
         return max(-1.0, min(1.0, score))
 
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract key terms from dream text."""
-        words = text.split()
-
-        # Find matches with our predefined word sets
-        all_keywords = (
-            self.upper_words
-            | self.downer_words
-            | self.dynamic_words
-            | self.static_words
-        )
-        found_keywords = [word for word in words if word in all_keywords]
-
-        # Remove duplicates while preserving order
-        unique_keywords = []
-        seen = set()
-        for keyword in found_keywords:
-            if keyword not in seen:
-                unique_keywords.append(keyword)
-                seen.add(keyword)
-
-        return unique_keywords[:10]  # Limit to top 10 keywords
+    def _extract_keywords(self, matches: Dict[str, int]) -> List[str]:
+        """Extract key terms from the matched lexicon words."""
+        # Matches are already unique and in order of first appearance
+        return list(matches)[:10]  # Limit to top 10 keywords
 
-    def _calculate_confidence(self, text: str, keywords: List[str]) -> float:
+    def _calculate_confidence(self, word_count: int, keywords: List[str]) -> float:
         """Calculate confidence in the analysis."""
-        text_length = len(text.split())
         keyword_count = len(keywords)
 
         # Base confidence on text length (more text = higher confidence)
-        length_factor = min(1.0, text_length / 50.0)  # Cap at 50 words
+        length_factor = min(1.0, word_count / 50.0)  # Cap at 50 words
 
         # Boost confidence based on keyword matches
         keyword_factor = min(1.0, keyword_count / 5.0)  # Cap at 5 keywords
@@ -1,55 +1,175 @@
-import uuid
+import secrets
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from .models import DreamRecord
+import numpy as np
+
+from .models import DreamAnalysis, DreamRecord
+
+# Initial number of rows in a user's score array; doubled whenever it fills up
+_INITIAL_SCORE_CAPACITY = 16
+
+
+@dataclass(frozen=True)
+class _DreamRow:
+    """Compact storage for a dream record.
+
+    Rows use slots rather than per-instance dicts; the pydantic DreamRecord is
+    only rebuilt when a dream is read back out of the database.
+    """
+
+    __slots__ = (
+        "id",
+        "dream_text",
+        "user_id",
+        "upper_downer_score",
+        "static_dynamic_score",
+        "confidence",
+        "keywords",
+        "timestamp",
+        "symbol_path",
+    )
+
+    id: str
+    dream_text: str
+    user_id: str
+    upper_downer_score: float
+    static_dynamic_score: float
+    confidence: float
+    keywords: Tuple[str, ...]
+    timestamp: datetime
+    symbol_path: Optional[str]
+
+    @classmethod
+    def from_record(cls, record: DreamRecord) -> "_DreamRow":
+        """Flatten a validated dream record into a row."""
+        analysis = record.analysis
+        return cls(
+            id=record.id,
+            dream_text=record.dream_text,
+            user_id=record.user_id,
+            upper_downer_score=analysis.upper_downer_score,
+            static_dynamic_score=analysis.static_dynamic_score,
+            confidence=analysis.confidence,
+            keywords=tuple(analysis.keywords),
+            timestamp=record.timestamp,
+            symbol_path=record.symbol_path,
+        )
+
+    def to_record(self) -> DreamRecord:
+        """Rebuild the dream record; the stored values were validated on the way in."""
+        return DreamRecord.model_construct(
+            id=self.id,
+            dream_text=self.dream_text,
+            user_id=self.user_id,
+            analysis=DreamAnalysis.model_construct(
+                upper_downer_score=self.upper_downer_score,
+                static_dynamic_score=self.static_dynamic_score,
+                confidence=self.confidence,
+                keywords=list(self.keywords),
+            ),
+            timestamp=self.timestamp,
+            symbol_path=self.symbol_path,
+        )
 
 
 class DreamDatabase:
     """Simple in-memory database for storing dream records."""
 
+    # Quadrant names indexed by (upper << 1 | dynamic)
+    _QUADRANTS = (
+        "Static Downer (Stagnant Negative)",
+        "Dynamic Downer (Chaotic Negative)",
+        "Static Upper (Peaceful Positive)",
+        "Dynamic Upper (Energetic Positive)",
+    )
+
     def __init__(self):
-        self.dreams: Dict[str, DreamRecord] = {}
+        self.dreams: Dict[str, _DreamRow] = {}
         self.user_dreams: Dict[str, List[str]] = {}  # user_id -> list of dream_ids
+        # user_id -> score rows (static_dynamic, upper_downer, confidence), one per
+        # stored dream; only the first len(user_dreams[user_id]) rows are in use
+        self.user_scores: Dict[str, np.ndarray] = {}
 
     def store_dream(self, dream_record: DreamRecord) -> str:
         """Store a dream record and return its ID."""
-        dream_id = str(uuid.uuid4())
+        # Random rather than sequential: GET /dream/{dream_id} is open to anyone
+        # holding an ID, so IDs must not be guessable from one another
+        dream_id = secrets.token_hex(8)
+        while dream_id in self.dreams:
+            dream_id = secrets.token_hex(8)
         dream_record.id = dream_id
 
-        self.dreams[dream_id] = dream_record
+        self.dreams[dream_id] = _DreamRow.from_record(dream_record)
 
         # Update user dreams index
         user_id = dream_record.user_id
         if user_id not in self.user_dreams:
             self.user_dreams[user_id] = []
         self.user_dreams[user_id].append(dream_id)
+        self._append_scores(user_id, dream_record.analysis)
 
         return dream_id
 
-    def get_user_dreams(self, user_id: str) -> List[DreamRecord]:
-        """Get all dreams for a specific user."""
-        dream_ids = self.user_dreams.get(user_id, [])
-        return [
-            self.dreams[dream_id] for dream_id in dream_ids if dream_id in self.dreams
-        ]
+    def _append_scores(self, user_id: str, analysis: DreamAnalysis):
+        """Append a dream's scores to the user's score array."""
+        row = len(self.user_dreams[user_id]) - 1
+        scores = self.user_scores.get(user_id)
+        if scores is None:
+            scores = np.empty((_INITIAL_SCORE_CAPACITY, 3))
+        elif row == len(scores):
+            grown = np.empty((2 * len(scores), 3))
+            grown[:row] = scores
+            scores = grown
+
+        scores[row] = (
+            analysis.static_dynamic_score,
+            analysis.upper_downer_score,
+            analysis.confidence,
+        )
+        self.user_scores[user_id] = scores
+
+    def get_user_scores(self, user_id: str) -> np.ndarray:
+        """Get an (n, 3) array of static_dynamic, upper_downer and confidence scores."""
+        scores = self.user_scores.get(user_id)
+        if scores is None:
+            return np.empty((0, 3))
+        return scores[: len(self.user_dreams[user_id])]
+
+    def iter_user_dreams(self, user_id: str) -> Iterator[DreamRecord]:
+        """Iterate over a user's dreams, oldest first."""
+        for dream_id in self.user_dreams.get(user_id, []):
+            if dream_id in self.dreams:
+                yield self.dreams[dream_id].to_record()
+
+    def get_user_dream_count(self, user_id: str) -> int:
+        """Get the number of dreams stored for a user."""
+        return len(self.user_dreams.get(user_id, []))
+
+    def get_latest_user_dream(self, user_id: str) -> Optional[DreamRecord]:
+        """Get a user's most recent dream."""
+        dream_ids = self.user_dreams.get(user_id)
+        if not dream_ids:
+            return None
+        return self.get_dream(dream_ids[-1])
 
     def get_dream(self, dream_id: str) -> Optional[DreamRecord]:
         """Get a specific dream by ID."""
-        return self.dreams.get(dream_id)
+        row = self.dreams.get(dream_id)
+        return row.to_record() if row else None
 
     def get_user_stats(self, user_id: str) -> Dict:
         """Get statistics for a user's dreams."""
-        dreams = self.get_user_dreams(user_id)
-        if not dreams:
+        scores = self.get_user_scores(user_id)
+        if not len(scores):
             return {"total_dreams": 0}
 
-        total = len(dreams)
-        avg_upper_downer = sum(d.analysis.upper_downer_score for d in dreams) / total
-        avg_static_dynamic = (
-            sum(d.analysis.static_dynamic_score for d in dreams) / total
+        # Column sums divided in Python; cheaper than mean() on small arrays
+        total = len(scores)
+        avg_static_dynamic, avg_upper_downer, avg_confidence = (
+            column_sum / total for column_sum in scores.sum(axis=0).tolist()
         )
-        avg_confidence = sum(d.analysis.confidence for d in dreams) / total
 
         return {
             "total_dreams": total,
@@ -63,11 +183,4 @@ class DreamDatabase:
 
     def _get_dominant_quadrant(self, x: float, y: float) -> str:
         """Determine which quadrant the user's dreams predominantly fall into."""
-        if y > 0 and x > 0:
-            return "Dynamic Upper (Energetic Positive)"
-        elif y > 0 and x <= 0:
-            return "Static Upper (Peaceful Positive)"
-        elif y <= 0 and x > 0:
-            return "Dynamic Downer (Chaotic Negative)"
-        else:
-            return "Static Downer (Stagnant Negative)"
+        return self._QUADRANTS[(y > 0) << 1 | (x > 0)]
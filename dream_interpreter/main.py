@@ -1,17 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
 from .analyser import Dreamanalyser
 from .database import DreamDatabase
-from .models import DreamInput, DreamRecord, SymbolResponse
+from .models import DreamBatchInput, DreamInput, DreamRecord, SymbolResponse
 from .symbol_generator import SymbolGenerator
 
 app = FastAPI(
     title="Dream Interpreter API",
     description="AI-powered dream interpretation with symbolic visualization",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Initialize components
@@ -19,6 +22,9 @@ analyser = Dreamanalyser()
 symbol_generator = SymbolGenerator()
 database = DreamDatabase()
 
+# CPU-bound analysis and rendering run here so they don't block the event loop
+executor = ThreadPoolExecutor(max_workers=4)
+
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -145,7 +151,9 @@ async def analyze_dream(dream_input: DreamInput):
     """Analyze a dream and store the results."""
     try:
         # Analyze the dream
-        analysis = analyser.analyze_dream(dream_input.dream_text)
+        analysis = await asyncio.get_running_loop().run_in_executor(
+            executor, analyser.analyze_dream, dream_input.dream_text
+        )
 
         # Create and store dream record
         dream_record = DreamRecord(
@@ -165,16 +173,56 @@ async def analyze_dream(dream_input: DreamInput):
         raise HTTPException(status_code=500, detail=f"Error analyzing dream: {str(e)}")
 
 
+@app.post("/analyze-dreams")
+async def analyze_dreams(batch: DreamBatchInput):
+    """Analyze a batch of dreams and store the results."""
+    try:
+        # Analyze all dreams in one pass
+        analyses = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            analyser.analyze_dreams,
+            [dream_input.dream_text for dream_input in batch.dreams],
+        )
+
+        # Build and validate every record before storing any, so a failed
+        # batch leaves the database untouched
+        dream_records = [
+            DreamRecord(
+                id="",  # Will be set by database
+                dream_text=dream_input.dream_text,
+                user_id=dream_input.user_id,
+                analysis=analysis,
+                timestamp=datetime.now(),
+            )
+            for dream_input, analysis in zip(batch.dreams, analyses)
+        ]
+        for dream_record in dream_records:
+            database.store_dream(dream_record)
+
+        return dream_records
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing dreams: {str(e)}")
+
+
 @app.get("/generate-symbol/{user_id}")
 async def generate_symbol(user_id: str) -> SymbolResponse:
     """Generate a symbol based on all user dreams."""
     try:
-        user_dreams = database.get_user_dreams(user_id)
-        symbol_base64 = symbol_generator.generate_symbol(user_dreams)
+        # Read everything before awaiting the render, so dreams stored while it
+        # runs can't mix into this response
+        dream_count = database.get_user_dream_count(user_id)
+        scores = database.get_user_scores(user_id)
+        latest_dream = database.get_latest_user_dream(user_id)
+
+        symbol_base64 = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            symbol_generator.generate_symbol_from_scores,
+            scores,
+        )
 
         # Get average coordinates for the latest position
-        if user_dreams:
-            latest_dream = user_dreams[-1]
+        if latest_dream:
             coordinates = (
                 latest_dream.analysis.static_dynamic_score,
                 latest_dream.analysis.upper_downer_score,
@@ -184,7 +232,7 @@ async def generate_symbol(user_id: str) -> SymbolResponse:
 
         return SymbolResponse(
             symbol_base64=symbol_base64,
-            dream_count=len(user_dreams),
+            dream_count=dream_count,
             coordinates=coordinates,
         )
 
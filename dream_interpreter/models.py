@@ -11,6 +11,14 @@ class DreamInput(BaseModel):
     user_id: Optional[str] = Field(default="anonymous", description="User identifier")
 
 
+class DreamBatchInput(BaseModel):
+    """Model for a batch of dreams submitted together."""
+
+    dreams: List[DreamInput] = Field(
+        ..., min_length=1, max_length=100, description="Dreams to analyze"
+    )
+
+
 class DreamAnalysis(BaseModel):
     """Model for dream analysis results."""
 
@@ -1,27 +1,78 @@
-import matplotlib
-
-matplotlib.use("Agg")
-
-import base64
+import binascii
+import hashlib
 import io
 import logging
-from typing import List, Tuple
+import threading
+from collections import OrderedDict
+from itertools import chain
+from typing import Iterable, List, Optional, Tuple
 
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
 import numpy as np
 from PIL import Image as PILImage
-from PIL import ImageDraw
+from PIL import ImageColor, ImageDraw
 
 from .models import DreamRecord
 
+try:  # Optional SIMD base64 encoder from the "speedups" extra
+    from pybase64 import b64encode_as_string
+except ImportError:
+
+    def b64encode_as_string(data) -> str:
+        """Base64 encode bytes-like data to a str with the standard library."""
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Symbols are drawn on a square canvas spanning -1.5..1.5 on both axes
+_SYMBOL_SIZE = 480  # pixels
+_SYMBOL_SCALE = _SYMBOL_SIZE / 3.0  # pixels per unit
+_LINE_WIDTH = 3  # pixels
+_MAX_LAYERS = 10  # Dream layers drawn around the base circle
+_RENDER_CACHE_SIZE = 256  # Rendered symbols kept for repeat requests
+_PNG_COMPRESS_LEVEL = 1  # Fastest deflate; symbols are flat, few-color images
+
+# ImageDraw methods for the layer shapes: dynamic, static and emotional dreams
+_LAYER_SHAPES = ("polygon", "rectangle", "ellipse")
+
+
+def _compute_layers(
+    xs: List[float], ys: List[float], n_colors: Tuple[int, int]
+) -> List[Tuple[int, bool, int]]:
+    """Classify dream layers from their (static_dynamic, upper_downer) scores.
+
+    Returns, per layer, its shape code (an index into ``_LAYER_SHAPES``),
+    whether it is upper rather than downer, and its color index within that
+    tone, given the number of colors of the (downer, upper) tones. At most
+    ``_MAX_LAYERS`` layers are drawn, so plain float arithmetic is faster
+    here than numpy's per-call dispatch.
+    """
+    layers = []
+    for x, y in zip(xs, ys):
+        abs_x, abs_y = abs(x), abs(y)
+
+        # Shape by dominant axis: triangles for dynamic dreams, squares for
+        # static ones and circles for more emotional than dynamic ones
+        if abs_x > abs_y:
+            shape = 0 if x > 0 else 1
+        else:
+            shape = 2
+
+        # Fill color by tone, then by intensity
+        upper = y > 0
+        count = n_colors[upper]
+        intensity = (abs_y + abs_x) / 2
+        layers.append((shape, upper, min(int(intensity * count), count - 1)))
+    return layers
+
 
 class SymbolGenerator:
     """Generates evolving symbols based on dream analysis."""
 
+    # The base symbol is the same for every new user, so it is rendered once
+    _base_symbol: Optional[str] = None
+
     def __init__(self):
         self.colors = {
             "upper": [
@@ -40,51 +91,100 @@ class SymbolGenerator:
             "static": ["#4682B4", "#6495ED", "#87CEEB"],  # Blue spectrum
         }
 
-    def generate_symbol(self, dreams: List[DreamRecord]) -> str:
+        # Primary colors indexed by quadrant; see _quadrant_index
+        self._primary_by_quadrant = (
+            self.colors["downer"][2],  # Static downer: navy
+            self.colors["downer"][0],  # Dynamic downer: purple
+            self.colors["upper"][3],  # Static upper: turquoise
+            self.colors["upper"][0],  # Dynamic upper: gold
+        )
+
+        # The canvas mapping never changes, so the fixed shapes and fills of the
+        # base circle and central symbol are resolved once
+        self._primary_fills = tuple(
+            self._rgba(color, 0.8) for color in self._primary_by_quadrant
+        )
+        self._highlight_fill = self._rgba("white", 0.8)
+        self._shadow_fill = self._rgba("black", 0.8)
+        self._base_circle_box = self._circle_box(0, 0, 0.3)
+        self._shadow_box = self._circle_box(0, 0, 0.1)
+        self._star_circle = (*self._to_pixel(0, 0), 0.15 * _SYMBOL_SCALE)
+
+        # Radiating lines indexed by avg_x > 0; longer lines for dynamic
+        self._ray_lines = (self._build_ray_lines(0.15), self._build_ray_lines(0.2))
+
+        # Dream layer fills indexed by [y > 0][intensity bucket]
+        self._dream_fills = tuple(
+            tuple(self._rgba(color, 0.7) for color in self.colors[tone])
+            for tone in ("downer", "upper")
+        )
+
+        # Pixel geometry of the layer shapes, indexed by layer count
+        self._layer_geometry = [
+            self._build_layer_geometry(n) for n in range(_MAX_LAYERS + 1)
+        ]
+
+        # Rendered symbols keyed on a digest of what they were drawn from (see
+        # _symbol_key), least recently used first; renders run on worker threads
+        self._render_cache = OrderedDict()
+        self._render_cache_lock = threading.Lock()
+
+    def generate_symbol(self, dreams: Iterable[DreamRecord]) -> str:
         """Generate a symbol based on all user dreams."""
         try:
-            logger.info(f"Starting symbol generation for {len(dreams)} dreams")
+            scores = self._scores_from_dreams(list(dreams))
+        except Exception as e:
+            logger.error(f"Error generating symbol: {e}")
+            return self._create_error_symbol()
+        return self.generate_symbol_from_scores(scores)
+
+    def generate_symbol_from_scores(self, scores: np.ndarray) -> str:
+        """Generate a symbol from the scores of all user dreams.
+
+        ``scores`` is an (n, 2) array of each dream's (static_dynamic,
+        upper_downer) scores in dream order, such as the database keeps per
+        user; extra columns are ignored.
+        """
+        try:
+            logger.info(f"Starting symbol generation for {len(scores)} dreams")
 
-            if not dreams:
+            if not len(scores):
                 logger.warning("No dreams provided, generating base symbol.")
                 return self._create_base_symbol()
 
             # Calculate average position and create symbol
-            avg_x, avg_y = self._calculate_average_position(dreams)
-            symbol_complexity = min(len(dreams), 10)  # Cap complexity at 10 dreams
+            avg_x, avg_y = self._calculate_average_position(scores)
+            symbol_complexity = min(len(scores), _MAX_LAYERS)  # Cap complexity
 
             logger.info(
                 f"Average position: ({avg_x:.2f}, {avg_y:.2f}), Complexity: {symbol_complexity}"
             )
 
-            # Create the symbol
-            fig, ax = plt.subplots(1, 1, figsize=(6, 6))
-            ax.set_xlim(-1.5, 1.5)
-            ax.set_ylim(-1.5, 1.5)
-            ax.set_aspect("equal")
-            ax.axis("off")
+            # Reuse the symbol if nothing it is drawn from has changed
+            key = self._symbol_key(scores, avg_x, avg_y, symbol_complexity)
+            with self._render_cache_lock:
+                image_base64 = self._render_cache.get(key)
+                if image_base64 is not None:
+                    self._render_cache.move_to_end(key)
+                    logger.info("Returning cached symbol.")
+                    return image_base64
 
             # Set background color based on dominant emotional tone
             bg_color = self._get_background_color(avg_y)
-            fig.patch.set_facecolor(bg_color)
+
+            img = PILImage.new("RGB", (_SYMBOL_SIZE, _SYMBOL_SIZE), color=bg_color)
+            draw = ImageDraw.Draw(img, "RGBA")
 
             # Draw the evolving symbol
-            self._draw_symbol_layers(ax, dreams, avg_x, avg_y, symbol_complexity)
+            self._draw_symbol_layers(draw, scores, avg_x, avg_y, symbol_complexity)
 
             # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(
-                buffer,
-                format="png",
-                bbox_inches="tight",
-                facecolor=bg_color,
-                edgecolor="none",
-                dpi=150,
-            )
-            plt.close(fig)
+            image_base64 = self._encode_image(img)
 
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+            with self._render_cache_lock:
+                self._render_cache[key] = image_base64
+                if len(self._render_cache) > _RENDER_CACHE_SIZE:
+                    self._render_cache.popitem(last=False)
 
             logger.info("Symbol generation completed successfully.")
             return image_base64
@@ -93,14 +193,44 @@ class SymbolGenerator:
             logger.error(f"Error generating symbol: {e}")
             return self._create_error_symbol()
 
-    def _calculate_average_position(
-        self, dreams: List[DreamRecord]
-    ) -> Tuple[float, float]:
-        """Calculate the average position of all dreams."""
-        x_coords = [dream.analysis.static_dynamic_score for dream in dreams]
-        y_coords = [dream.analysis.upper_downer_score for dream in dreams]
-
-        return np.mean(x_coords), np.mean(y_coords)
+    def _symbol_key(
+        self, scores: np.ndarray, avg_x: float, avg_y: float, complexity: int
+    ) -> bytes:
+        """Digest everything a rendered symbol depends on.
+
+        Apart from the dreams drawn as layers, the averages only matter through
+        the thresholds they cross. A new dream that moves them without crossing
+        any therefore maps to the symbol already rendered.
+        """
+        digest = hashlib.blake2b(
+            np.ascontiguousarray(scores[:complexity, :2], dtype=np.float64).tobytes(),
+            digest_size=16,
+        )
+        state = (
+            self._get_background_color(avg_y),
+            self._quadrant_index(avg_x, avg_y),
+            self._central_symbol_parts(avg_x, avg_y),
+        )
+        digest.update(repr(state).encode())
+        return digest.digest()
+
+    def _scores_from_dreams(self, dreams: List[DreamRecord]) -> np.ndarray:
+        """Build the (n, 2) array of (static_dynamic, upper_downer) scores."""
+        return np.fromiter(
+            chain.from_iterable(
+                (d.analysis.static_dynamic_score, d.analysis.upper_downer_score)
+                for d in dreams
+            ),
+            dtype=np.float64,
+            count=2 * len(dreams),
+        ).reshape(-1, 2)
+
+    def _calculate_average_position(self, scores: np.ndarray) -> Tuple[float, float]:
+        """Calculate the average position of all dreams from their (x, y) scores."""
+        # Dividing the column sums in Python skips ndarray.mean's dispatch,
+        # which dominates for the handful of dreams a user has
+        sum_x, sum_y = scores[:, :2].sum(axis=0).tolist()
+        return sum_x / len(scores), sum_y / len(scores)
 
     def _get_background_color(self, avg_y: float) -> str:
         """Get background color based on emotional tone."""
@@ -112,183 +242,196 @@ class SymbolGenerator:
             return "#F5F5F5"  # Light gray (neutral)
 
     def _draw_symbol_layers(
-        self, ax, dreams: List[DreamRecord], avg_x: float, avg_y: float, complexity: int
+        self,
+        draw: ImageDraw.ImageDraw,
+        scores: np.ndarray,
+        avg_x: float,
+        avg_y: float,
+        complexity: int,
     ):
         """Draw the layered symbol based on dreams."""
         # Base circle representing the dreamer's core
         try:
-            base_color = self._get_primary_color(avg_x, avg_y)
-            base_circle = patches.Circle(
-                (0, 0),
-                0.3,
-                facecolor=base_color,
-                edgecolor="white",
-                linewidth=2,
-                alpha=0.8,
+            draw.ellipse(
+                self._base_circle_box,
+                fill=self._primary_fills[self._quadrant_index(avg_x, avg_y)],
+                outline=self._highlight_fill,
+                width=_LINE_WIDTH,
             )
-            ax.add_patch(base_circle)
 
             # Add layers for each dream (up to complexity limit)
-            for i, dream in enumerate(dreams[:complexity]):
-                self._add_dream_layer(ax, dream, i, complexity)
+            for shape, xy, fill in self._dream_layer_shapes(scores, complexity):
+                getattr(draw, shape)(xy, fill=fill)
 
             # Add central symbol based on dominant characteristics
-            self._add_central_symbol(ax, avg_x, avg_y)
+            self._add_central_symbol(draw, avg_x, avg_y)
 
         except Exception as e:
             logger.error(f"Error drawing symbol layers: {e}")
 
-    def _get_primary_color(self, x: float, y: float) -> str:
-        """Get primary color based on coordinates."""
-        try:
-            if y > 0:  # Upper
-                if x > 0:  # Dynamic upper
-                    return self.colors["upper"][0]  # Gold
-                else:  # Static upper
-                    return self.colors["upper"][3]  # Turquoise
-            else:  # Downer
-                if x > 0:  # Dynamic downer
-                    return self.colors["downer"][0]  # Purple
-                else:  # Static downer
-                    return self.colors["downer"][2]  # Navy
-
-        except Exception as e:
-            logger.error(f"Error selecting primary color: {e}")
-            return "#808080"  # Fallback to gray
-
-    def _add_dream_layer(
-        self, ax, dream: DreamRecord, layer_index: int, total_layers: int
+    def _to_pixel(self, x: float, y: float) -> Tuple[float, float]:
+        """Map symbol coordinates or arrays of them to pixels (y grows upwards)."""
+        return (
+            _SYMBOL_SIZE / 2 + x * _SYMBOL_SCALE,
+            _SYMBOL_SIZE / 2 - y * _SYMBOL_SCALE,
+        )
+
+    def _circle_box(self, x: float, y: float, radius: float) -> List[float]:
+        """Get the pixel bounding box of a circle in symbol coordinates."""
+        px, py = self._to_pixel(x, y)
+        r = radius * _SYMBOL_SCALE
+        return [px - r, py - r, px + r, py + r]
+
+    def _rgba(self, color: str, alpha: float) -> Tuple[int, int, int, int]:
+        """Convert a color name or hex string to an RGBA fill."""
+        return ImageColor.getrgb(color)[:3] + (round(alpha * 255),)
+
+    def _quadrant_index(self, x: float, y: float) -> int:
+        """Index the quadrant of a position as (y > 0) << 1 | (x > 0)."""
+        return (y > 0) << 1 | (x > 0)
+
+    def _build_layer_geometry(self, total_layers: int) -> Tuple[list, list, list]:
+        """Compute the pixel geometry of every shape a layer can take.
+
+        Layers sit at evenly spaced angles around the base circle, expanding
+        outward. Returns, per layer, the flattened vertices of its triangle and
+        the bounding boxes of its square and circle.
+        """
+        index = np.arange(total_layers)
+        angles = 2 * np.pi * index / max(total_layers, 1)
+        radii = 0.5 + (index * 0.1)
+        pos_x = radii * np.cos(angles) * 0.5  # Scale down
+        pos_y = radii * np.sin(angles) * 0.5
+
+        # Triangle with a vertex on top
+        vertex_angles = np.pi / 2 + 2 * np.pi * np.arange(3) / 3
+        triangles = np.stack(
+            self._to_pixel(
+                pos_x[:, None] + 0.1 * np.cos(vertex_angles),
+                pos_y[:, None] + 0.1 * np.sin(vertex_angles),
+            ),
+            axis=-1,
+        )
+
+        left, top = self._to_pixel(pos_x - 0.05, pos_y + 0.05)
+        right, bottom = self._to_pixel(pos_x + 0.05, pos_y - 0.05)
+        squares = np.column_stack([left, top, right, bottom])
+
+        center_x, center_y = self._to_pixel(pos_x, pos_y)
+        r = 0.05 * _SYMBOL_SCALE
+        circles = np.column_stack(
+            [center_x - r, center_y - r, center_x + r, center_y + r]
+        )
+
+        return (
+            triangles.reshape(total_layers, 6).tolist(),
+            squares.tolist(),
+            circles.tolist(),
+        )
+
+    def _dream_layer_shapes(
+        self, scores: np.ndarray, complexity: int
+    ) -> List[Tuple[str, list, Tuple[int, int, int, int]]]:
+        """Compute the shapes of the dream layers, in drawing order.
+
+        Each shape is the name of the ``ImageDraw`` method that draws it, its
+        pixel coordinates and its fill.
+        """
+        layers = _compute_layers(
+            scores[:complexity, 0].tolist(),
+            scores[:complexity, 1].tolist(),
+            (len(self._dream_fills[0]), len(self._dream_fills[1])),
+        )
+
+        geometry = self._layer_geometry[complexity]
+        return [
+            (_LAYER_SHAPES[shape], geometry[shape][i], self._dream_fills[upper][color])
+            for i, (shape, upper, color) in enumerate(layers)
+        ]
+
+    def _central_symbol_parts(
+        self, avg_x: float, avg_y: float
+    ) -> Tuple[Optional[str], Optional[bool]]:
+        """Choose the central symbol's parts from the overall dream pattern.
+
+        Returns the center shape, if any, and whether radiating lines are
+        drawn for a dynamic (True) or static (False) pattern, if at all.
+        """
+        center = None
+        if avg_y > 0.5:  # Very positive: a star
+            center = "star"
+        elif avg_y < -0.5:  # Very negative: a darker center
+            center = "shadow"
+
+        rays = None
+        if abs(avg_x) > 0.5:  # Very dynamic or static: radiating lines
+            rays = avg_x > 0
+
+        return center, rays
+
+    def _add_central_symbol(
+        self, draw: ImageDraw.ImageDraw, avg_x: float, avg_y: float
     ):
-        """Add a layer representing a single dream."""
-        try:
-            x = dream.analysis.static_dynamic_score
-            y = dream.analysis.upper_downer_score
-
-            # Calculate position around the base circle
-            angle = (2 * np.pi * layer_index) / total_layers
-            radius = 0.5 + (layer_index * 0.1)  # Expanding outward
-
-            pos_x = radius * np.cos(angle) * 0.5  # Scale down
-            pos_y = radius * np.sin(angle) * 0.5
-
-            # Choose shape based on dream characteristics
-            if abs(x) > abs(y):  # More dynamic/static than upper/downer
-                if x > 0:  # Dynamic - use triangles
-                    triangle = patches.RegularPolygon(
-                        (pos_x, pos_y),
-                        3,
-                        radius=0.1,
-                        facecolor=self._get_dream_color(x, y),
-                        alpha=0.7,
-                    )
-                    ax.add_patch(triangle)
-                else:  # Static - use squares
-                    square = patches.Rectangle(
-                        (pos_x - 0.05, pos_y - 0.05),
-                        0.1,
-                        0.1,
-                        facecolor=self._get_dream_color(x, y),
-                        alpha=0.7,
-                    )
-                    ax.add_patch(square)
-            else:  # More emotional than dynamic
-                circle = patches.Circle(
-                    (pos_x, pos_y),
-                    0.05,
-                    facecolor=self._get_dream_color(x, y),
-                    alpha=0.7,
-                )
-                ax.add_patch(circle)
-        except Exception as e:
-            logger.error(f"Error adding dream layer: {layer_index}: {str(e)}")
-
-    def _get_dream_color(self, x: float, y: float) -> str:
-        """Get color for individual dream based on its coordinates."""
-        try:
-            if y > 0:
-                colors = self.colors["upper"]
-            else:
-                colors = self.colors["downer"]
-
-            # Pick color based on intensity
-            intensity = (abs(y) + abs(x)) / 2
-            color_index = min(int(intensity * len(colors)), len(colors) - 1)
-            return colors[color_index]
-        except Exception as e:
-            logger.error(f"Error selecting dream color: {e}")
-            return "#808080"  # Fallback to gray
-
-    def _add_central_symbol(self, ax, avg_x: float, avg_y: float):
         """Add a central symbol representing the overall dream pattern."""
         try:
-            if avg_y > 0.5:  # Very positive
-                # Add a star
-                star = patches.RegularPolygon(
-                    (0, 0),
+            center, rays = self._central_symbol_parts(avg_x, avg_y)
+            if center == "star":
+                draw.regular_polygon(
+                    self._star_circle,
                     5,
-                    radius=0.15,
-                    facecolor="white",
-                    edgecolor="gold",
-                    linewidth=2,
+                    fill="white",
+                    outline="gold",
+                    width=_LINE_WIDTH,
                 )
-                ax.add_patch(star)
-            elif avg_y < -0.5:  # Very negative
-                # Add a darker center
-                center = patches.Circle((0, 0), 0.1, facecolor="black", alpha=0.8)
-                ax.add_patch(center)
-
-            if abs(avg_x) > 0.5:  # Very dynamic or static
-                # Add radiating lines
-                for angle in np.linspace(0, 2 * np.pi, 8, endpoint=False):
-                    line_length = 0.2 if avg_x > 0 else 0.15  # Longer lines for dynamic
-                    end_x = line_length * np.cos(angle)
-                    end_y = line_length * np.sin(angle)
-                    ax.plot([0, end_x], [0, end_y], "white", linewidth=2, alpha=0.8)
+            elif center == "shadow":
+                draw.ellipse(self._shadow_box, fill=self._shadow_fill)
+
+            if rays is not None:
+                for line in self._ray_lines[rays]:
+                    draw.line(line, fill=self._highlight_fill, width=_LINE_WIDTH)
 
         except Exception as e:
             logger.error(f"Error adding central symbol: {e}")
 
+    def _build_ray_lines(self, line_length: float) -> List[List[float]]:
+        """Compute the pixel endpoints of eight rays radiating from the center.
+
+        Each pair of opposite rays is a single line through the center.
+        """
+        angles = np.linspace(0, np.pi, 4, endpoint=False)
+        end_x = line_length * np.cos(angles)
+        end_y = line_length * np.sin(angles)
+        return np.column_stack(
+            [*self._to_pixel(-end_x, -end_y), *self._to_pixel(end_x, end_y)]
+        ).tolist()
+
     def _create_base_symbol(self) -> str:
         """Create a base symbol for new users."""
+        if SymbolGenerator._base_symbol is not None:
+            return SymbolGenerator._base_symbol
+
         try:
-            fig, ax = plt.subplots(1, 1, figsize=(6, 6))
-            ax.set_xlim(-1.5, 1.5)
-            ax.set_ylim(-1.5, 1.5)
-            ax.set_aspect("equal")
-            ax.axis("off")
-            fig.patch.set_facecolor("#F5F5F5")
+            img = PILImage.new("RGB", (_SYMBOL_SIZE, _SYMBOL_SIZE), color="#F5F5F5")
+            draw = ImageDraw.Draw(img, "RGBA")
 
             # Simple circle for new dreamers
-            circle = patches.Circle(
-                (0, 0),
-                0.3,
-                facecolor="lightgray",
-                edgecolor="white",
-                linewidth=2,
-                alpha=0.8,
+            draw.ellipse(
+                self._base_circle_box,
+                fill=self._rgba("lightgray", 0.8),
+                outline=self._highlight_fill,
+                width=_LINE_WIDTH,
             )
-            ax.add_patch(circle)
 
             # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(
-                buffer,
-                format="png",
-                bbox_inches="tight",
-                facecolor="#F5F5F5",
-                edgecolor="none",
-                dpi=150,
-            )
-            plt.close(fig)
-
-            buffer.seek(0)
-            return base64.b64encode(buffer.getvalue()).decode("utf-8")
+            image_base64 = self._encode_image(img)
+            SymbolGenerator._base_symbol = image_base64
+            return image_base64
         except Exception as e:
             logger.error(f"Error creating base symbol: {e}")
             return self._create_error_symbol()
 
     def _create_error_symbol(self) -> str:
-        """Create a simple error symbol when matplotlib fails."""
+        """Create a simple error symbol when drawing fails."""
         try:
             # Create a minimal 100x100 white image with a simple pattern
 
@@ -299,11 +442,14 @@ class SymbolGenerator:
             draw.ellipse([25, 25, 75, 75], fill="lightblue", outline="black")
 
             # Convert to base64
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            buffer.seek(0)
-
-            return base64.b64encode(buffer.getvalue()).decode("utf-8")
+            return self._encode_image(img)
         except Exception:
             # Last resort: return a tiny transparent image
             return "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+
+    def _encode_image(self, img: PILImage.Image) -> str:
+        """Encode an image as a base64 PNG string."""
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", compress_level=_PNG_COMPRESS_LEVEL)
+        # Encode straight from the buffer's memory rather than a copy of it
+        return b64encode_as_string(buffer.getbuffer())
@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from dream_interpreter.analyser import Dreamanalyser
@@ -62,3 +64,46 @@ class TestDreamanalyser:
         assert expected_keywords.intersection(
             found_keywords
         ), "Should find relevant keywords"
+
+    @pytest.mark.parametrize(
+        "dream_text, expected_keywords",
+        [
+            ("I was so happy😊 and flying✈️", ["happy", "flying"]),
+            ("love♥", ["love"]),
+            ("calm™", ["calm"]),
+            ("beautiful€", ["beautiful"]),
+            ("falling→drowning", ["falling", "drowning"]),
+            ("calm。quiet、alone", ["calm", "quiet", "alone"]),
+        ],
+    )
+    def test_symbols_and_emoji_split_words(self, dream_text, expected_keywords):
+        """Test that emoji and non-ASCII symbols don't stick to adjacent words."""
+        analysis = self.analyser.analyze_dream(dream_text)
+        spaced = self.analyser.analyze_dream(re.sub(r"[^\w\s]", " ", dream_text))
+
+        assert analysis.keywords == expected_keywords
+        assert analysis == spaced
+
+    def test_repeated_dream_uses_cache(self):
+        """Test that repeated text is served from the cache as fresh models."""
+        dream_text = "I was dancing in a bright golden hall"
+        first = self.analyser.analyze_dream(dream_text)
+        first.keywords.append("mutated")
+        second = self.analyser.analyze_dream(dream_text)
+
+        assert self.analyser._analyze_cached.cache_info().hits == 1
+        assert "mutated" not in second.keywords
+        assert second.upper_downer_score == first.upper_downer_score
+
+    def test_batch_matches_single_analysis(self):
+        """Test that batch analysis gives the same results as one at a time."""
+        dreams = [
+            "I was running and jumping, feeling very happy",
+            "I slept.",
+            "I was sitting alone in a dark, empty room",
+            "",
+        ]
+
+        batch = self.analyser.analyze_dreams(dreams)
+
+        assert batch == [self.analyser.analyze_dream(dream) for dream in dreams]
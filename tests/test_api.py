@@ -41,6 +41,53 @@ class TestAPI:
         response = self.client.post("/analyze-dream", json=dream_data)
         assert response.status_code == 200
 
+    def test_analyze_dreams_batch_endpoint(self):
+        """Test batch dream analysis endpoint."""
+        batch = {
+            "dreams": [
+                {"dream_text": "I was flying over golden fields", "user_id": "batch"},
+                {"dream_text": "I was trapped in a dark cellar", "user_id": "batch"},
+            ]
+        }
+
+        response = self.client.post("/analyze-dreams", json=batch)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert len(data) == 2
+        assert data[0]["analysis"]["upper_downer_score"] > 0
+        assert data[1]["analysis"]["upper_downer_score"] < 0
+        assert data[0]["id"] != data[1]["id"]
+
+        stats = self.client.get("/user-stats/batch").json()
+        assert stats["total_dreams"] >= 2
+
+    def test_failed_batch_stores_nothing(self):
+        """Test that a batch with an invalid record stores none of its dreams."""
+        batch = {
+            "dreams": [
+                {
+                    "dream_text": "I was flying over golden fields, feeling happy",
+                    "user_id": "atomic_batch",
+                },
+                {
+                    "dream_text": "I was trapped in a dark room, feeling alone",
+                    "user_id": None,
+                },
+            ]
+        }
+
+        response = self.client.post("/analyze-dreams", json=batch)
+        assert response.status_code == 500
+
+        stats = self.client.get("/user-stats/atomic_batch").json()
+        assert stats["total_dreams"] == 0
+
+    def test_empty_batch_rejected(self):
+        """Test that an empty batch fails validation."""
+        response = self.client.post("/analyze-dreams", json={"dreams": []})
+        assert response.status_code == 422
+
     def test_generate_symbol_endpoint(self):
         """Test symbol generation endpoint."""
         # First analyze a dream
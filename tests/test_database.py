@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from dream_interpreter.database import DreamDatabase
+from dream_interpreter.models import DreamAnalysis, DreamRecord
+
+
+class TestDreamDatabase:
+    """Test cases for the DreamDatabase class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.database = DreamDatabase()
+
+    def _store(self, user_id: str, upper_downer: float, static_dynamic: float):
+        """Store a dream with the given scores."""
+        record = DreamRecord(
+            id="",
+            dream_text="A dream for the database tests",
+            user_id=user_id,
+            analysis=DreamAnalysis(
+                upper_downer_score=upper_downer,
+                static_dynamic_score=static_dynamic,
+                confidence=0.8,
+                keywords=[],
+            ),
+            timestamp=datetime.now(),
+        )
+        return self.database.store_dream(record)
+
+    def test_user_stats_averages(self):
+        """Test that user stats average the stored scores."""
+        self._store("stats_user", 0.5, -0.2)
+        self._store("stats_user", 0.1, -0.4)
+        self._store("other_user", -1.0, 1.0)
+
+        stats = self.database.get_user_stats("stats_user")
+
+        assert stats["total_dreams"] == 2
+        assert stats["average_emotional_score"] == pytest.approx(0.3)
+        assert stats["average_dynamic_score"] == pytest.approx(-0.3)
+        assert stats["average_confidence"] == pytest.approx(0.8)
+        assert stats["dominant_quadrant"] == "Static Upper (Peaceful Positive)"
+
+    def test_user_scores_grow_past_initial_capacity(self):
+        """Test that the score array keeps every dream as it grows."""
+        for i in range(40):
+            self._store("busy_user", 0.0, i / 100)
+
+        scores = self.database.get_user_scores("busy_user")
+
+        assert scores.shape == (40, 3)
+        assert scores[:, 0].tolist() == pytest.approx([i / 100 for i in range(40)])
+
+    def test_user_scores_for_unknown_user(self):
+        """Test that unknown users have an empty score array."""
+        assert self.database.get_user_scores("nobody").shape == (0, 3)
+
+    def test_dream_ids_are_unique(self):
+        """Test that every stored dream gets its own ID."""
+        ids = [self._store("id_user", 0.0, 0.0) for _ in range(5)]
+
+        assert len(set(ids)) == 5
+        assert self.database.get_dream(ids[-1]).id == ids[-1]
+
+    def test_dream_ids_are_not_predictable(self):
+        """Test that fresh databases don't hand out the same first ID."""
+        first_id = self._store("id_user", 0.0, 0.0)
+        self.database = DreamDatabase()
+
+        assert self._store("id_user", 0.0, 0.0) != first_id
+
+    def test_user_dream_accessors(self):
+        """Test the per-user count, latest dream and iteration accessors."""
+        first = self._store("accessor_user", 0.1, 0.1)
+        latest = self._store("accessor_user", 0.2, 0.2)
+
+        assert self.database.get_user_dream_count("accessor_user") == 2
+        assert self.database.get_latest_user_dream("accessor_user").id == latest
+        assert [d.id for d in self.database.iter_user_dreams("accessor_user")] == [
+            first,
+            latest,
+        ]
+
+        assert self.database.get_user_dream_count("nobody") == 0
+        assert self.database.get_latest_user_dream("nobody") is None
+        assert list(self.database.iter_user_dreams("nobody")) == []
+
+    def test_stored_dream_round_trip(self):
+        """Test that a stored dream reads back with the same content."""
+        dream_id = self._store("round_trip_user", -0.3, 0.6)
+
+        dream = self.database.get_dream(dream_id)
+
+        assert dream.user_id == "round_trip_user"
+        assert dream.analysis.upper_downer_score == -0.3
+        assert dream.analysis.static_dynamic_score == 0.6
+        assert dream.model_dump() == self.database.get_dream(dream_id).model_dump()
+        assert self.database.get_dream("missing") is None
@@ -1,9 +1,14 @@
+import base64
+import io
 from datetime import datetime
 
+import numpy as np
 import pytest
+from PIL import Image
 
+from dream_interpreter import symbol_generator
 from dream_interpreter.models import DreamAnalysis, DreamRecord
-from dream_interpreter.symbol_generator import SymbolGenerator
+from dream_interpreter.symbol_generator import SymbolGenerator, _compute_layers
 
 
 class TestSymbolGenerator:
@@ -23,6 +28,13 @@ class TestSymbolGenerator:
             symbol_base64.replace("+", "").replace("/", "").replace("=", "").isalnum()
         )
 
+    def test_base_symbol_is_cached(self):
+        """Test that the base symbol is rendered once and shared."""
+        symbol_base64 = self.generator.generate_symbol([])
+
+        assert SymbolGenerator._base_symbol == symbol_base64
+        assert SymbolGenerator().generate_symbol([]) is symbol_base64
+
     def test_single_dream_symbol(self):
         """Test symbol generation with a single dream."""
         dream = DreamRecord(
@@ -66,12 +78,108 @@ class TestSymbolGenerator:
         assert symbol_base64 is not None
         assert len(symbol_base64) > 0
 
+    @pytest.mark.parametrize(
+        "scores, background",
+        [
+            ([], (245, 245, 245)),  # Base symbol
+            ([[0.2, 0.8]], (255, 248, 220)),  # Positive: cornsilk
+            ([[0.2, -0.8]], (47, 47, 47)),  # Negative: dark gray
+            ([[0.2, 0.1]], (245, 245, 245)),  # Neutral: light gray
+        ],
+    )
+    def test_symbol_background(self, scores, background):
+        """Test that the symbol background follows the emotional tone."""
+        symbol_base64 = self.generator.generate_symbol_from_scores(
+            np.array(scores).reshape(-1, 2)
+        )
+
+        image = Image.open(io.BytesIO(base64.b64decode(symbol_base64)))
+
+        assert image.convert("RGB").getpixel((10, 10)) == background
+
     def test_color_selection(self):
         """Test that color selection works correctly."""
         # Test upper-right quadrant (positive, dynamic)
-        color = self.generator._get_primary_color(0.5, 0.5)
+        color = self.generator._primary_by_quadrant[
+            self.generator._quadrant_index(0.5, 0.5)
+        ]
         assert color in self.generator.colors["upper"]
 
         # Test lower-left quadrant (negative, static)
-        color = self.generator._get_primary_color(-0.5, -0.5)
+        color = self.generator._primary_by_quadrant[
+            self.generator._quadrant_index(-0.5, -0.5)
+        ]
         assert color in self.generator.colors["downer"]
+
+    def test_dream_fill_selection(self):
+        """Test that dream fills follow tone and intensity."""
+        scores = np.array([[0.0, 0.1], [-1.0, -1.0]])
+
+        fills = [fill for _, _, fill in self.generator._dream_layer_shapes(scores, 2)]
+
+        assert fills == [
+            self.generator._rgba(self.generator.colors["upper"][0], 0.7),
+            self.generator._rgba(self.generator.colors["downer"][3], 0.7),
+        ]
+
+    def test_average_position_from_scores(self):
+        """Test that the average position is the column mean of the scores."""
+        scores = np.array([[0.5, -0.2], [0.1, 0.4], [-0.3, 0.1]])
+
+        avg_x, avg_y = self.generator._calculate_average_position(scores)
+
+        assert avg_x == pytest.approx(0.1)
+        assert avg_y == pytest.approx(0.1)
+
+    def test_dream_layer_shapes(self):
+        """Test that each dream layer gets the shape for its dominant axis."""
+        scores = np.array([[0.9, 0.1], [-0.9, 0.1], [0.1, 0.9]])
+
+        shapes = self.generator._dream_layer_shapes(scores, len(scores))
+
+        assert [shape for shape, _, _ in shapes] == ["polygon", "rectangle", "ellipse"]
+        assert len(shapes[0][1]) == 6  # Flattened triangle vertices
+        assert all(len(xy) == 4 for _, xy, _ in shapes[1:])  # Bounding boxes
+
+    def test_repeat_scores_reuse_cached_symbol(self):
+        """Test that rendering the same scores again returns the cached symbol."""
+        scores = np.array([[0.6, 0.7], [-0.2, 0.3]])
+
+        first = self.generator.generate_symbol_from_scores(scores)
+
+        assert self.generator.generate_symbol_from_scores(scores.copy()) is first
+        assert self.generator.generate_symbol_from_scores(scores[:1]) != first
+
+    def test_render_cache_evicts_least_recently_used(self, monkeypatch):
+        """Test that the render cache stays within its size limit."""
+        monkeypatch.setattr(symbol_generator, "_RENDER_CACHE_SIZE", 2)
+        first, second, third = (np.array([[0.1 * i, 0.2]]) for i in range(3))
+
+        symbol = self.generator.generate_symbol_from_scores(first)
+        self.generator.generate_symbol_from_scores(second)
+        assert (
+            self.generator.generate_symbol_from_scores(first) is symbol
+        )  # Now most recent
+        self.generator.generate_symbol_from_scores(third)
+
+        assert len(self.generator._render_cache) == 2
+        assert self.generator.generate_symbol_from_scores(first) is symbol
+
+    def test_new_dream_reuses_symbol_when_drawing_is_unchanged(self):
+        """Test that dreams past the layer limit only re-render on a visible change."""
+        scores = np.tile([[0.1, 0.1]], (10, 1))
+        symbol_base64 = self.generator.generate_symbol_from_scores(scores)
+
+        # An eleventh dream moves the averages without crossing a threshold
+        calmer = np.vstack([scores, [[0.2, 0.2]]])
+        assert self.generator.generate_symbol_from_scores(calmer) is symbol_base64
+
+        # A strongly positive one turns the background light
+        brighter = np.vstack([scores, np.tile([[0.1, 1.0]], (4, 1))])
+        assert self.generator.generate_symbol_from_scores(brighter) != symbol_base64
+
+    def test_compute_layers(self):
+        """Test layer shape, tone and color index classification."""
+        layers = _compute_layers([0.9, -0.9, 0.0, -1.0], [0.1, 0.1, -0.2, -1.0], (4, 4))
+
+        assert layers == [(0, True, 2), (1, True, 2), (2, False, 0), (2, False, 3)]